@@ -12,6 +12,7 @@
         'views/book_view.xml',
         'views/book_list_template.xml',
         'reports/library_book_report.xml',
+        'data/library_book_report_cron.xml',
     ],
     'demo': [
         'data/res.partner.csv',
@@ -1,9 +1,48 @@
+import hashlib
+
+from werkzeug.http import is_resource_modified
+from werkzeug.urls import url_encode
+
 from odoo import http
 
 class Books(http.Controller):
+    _books_per_page = 80
+
+    def _get_book_domain(self, **kwargs):
+        return []
+
+    def _page_url(self, page, **kwargs):
+        return '/library/books?%s' % url_encode(dict(kwargs, page=page))
 
     @http.route('/library/books', auth='user')
-    def list(self, **kwargs):
+    def list(self, page='1', **kwargs):
         Book = http.request.env['library.book']
-        books = Book.search([])
-        return http.request.render('library_app.book_list_template', {'books': books})
+        domain = self._get_book_domain(**kwargs)
+        page = int(page) if str(page).isdigit() and int(page) > 0 else 1
+        step = self._books_per_page
+        total = Book.search_count(domain)
+        books = Book.search(domain, limit=step, offset=(page - 1) * step)
+        # The page only changes when one of its books or their publishers,
+        # the page's ids or the book count change: let browsers and proxies
+        # revalidate with a 304. No Last-Modified is sent, since a date
+        # can't tell that a book was deleted or the page shifted.
+        etag = hashlib.sha1(repr((
+            http.request.env.uid, http.request.env.lang, kwargs,
+            books.ids, total,
+            books.mapped('write_date'),
+            books.mapped('publisher_id.write_date'),
+        )).encode()).hexdigest()
+        headers = [('Cache-Control', 'private, no-cache')]
+        environ = http.request.httprequest.environ
+        if not is_resource_modified(environ, etag=etag):
+            response = http.Response(status=304, headers=headers)
+        else:
+            response = http.request.render(
+                'library_app.book_list_template',
+                {'books': books,
+                 'prev_url': page > 1 and self._page_url(page - 1, **kwargs),
+                 'next_url': (page * step < total
+                              and self._page_url(page + 1, **kwargs))},
+                headers=headers)
+        response.set_etag(etag)
+        return response
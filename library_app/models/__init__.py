@@ -1,3 +1,4 @@
 from . import library_book
 from . import res_partner
 from . import library_book_category
+from . import library_book_loader
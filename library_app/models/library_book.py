@@ -42,12 +42,21 @@ class Book(models.Model):
         'res.country', string='Publisher Country (related)',
         related='publisher_id.country_id',
         )
+    isbn_normalized = fields.Char(
+        'Normalized ISBN',
+        compute='_compute_isbn_normalized',
+        store=True,
+        help="ISBN-13 digits, used for exact ISBN lookups.",
+        )
 
     _sql_constraints = [
         ('library_book_name_date_uq', # Constraint unique identifier
         'UNIQUE (name, date_published)', # Constraint SQL syntax
         'Book title and publication date must be unique.'), # Message
         ('library_book_check_date', 'CHECK (date_published <= current_date)', 'Publication date must not be in the future.'),
+        ('library_book_isbn_uq',
+        'UNIQUE (isbn_normalized)',
+        'A book with this ISBN already exists.'),
         ]
 
 
@@ -63,15 +72,76 @@ class Book(models.Model):
     def _search_publisher_country(self, operator, value):
         return [('publisher_id.country_id', operator, value)]
 
-    def _check_isbn(self):
-        self.ensure_one()
-        digits = [int(x) for x in self.isbn if x.isdigit()]
+    @api.model
+    def _isbn_digits(self, isbn):
+        return [int(x) for x in isbn if x.isdigit()]
+
+    @api.model
+    def _is_valid_isbn_digits(self, digits):
         if len(digits) == 13:
             ponderations = [1, 3] * 6
             terms = [a * b for a, b in zip(digits[:12], ponderations)]
             remain = sum(terms) % 10
             check = 10 - remain if remain != 0 else 0
-        return digits[-1] == check
+            return digits[-1] == check
+        return False
+
+    @api.model
+    def _normalize_isbn(self, isbn):
+        "Return the ISBN-13 digits of a valid ISBN, or False"
+        digits = self._isbn_digits(isbn or '')
+        if not self._is_valid_isbn_digits(digits):
+            return False
+        if len(digits) == 10:
+            digits = [9, 7, 8] + digits[:9]
+            remain = sum(
+                a * b for a, b in zip(digits, [1, 3] * 6)) % 10
+            digits.append(10 - remain if remain != 0 else 0)
+        return ''.join(str(x) for x in digits)
+
+    @api.depends('isbn')
+    def _compute_isbn_normalized(self):
+        for book in self:
+            book.isbn_normalized = self._normalize_isbn(book.isbn)
+
+    def _check_isbn(self):
+        self.ensure_one()
+        return self._is_valid_isbn_digits(self._isbn_digits(self.isbn))
+
+    @api.model
+    def validate_isbns(self, isbns):
+        """Check a whole chunk of ISBNs, e.g. before an import.
+
+        Returns a list of (index, isbn, error) for every bad row: invalid
+        ISBNs, ISBNs repeated in the chunk and ISBNs already in use.
+        Existing ISBNs are looked up with a single query.
+        """
+        errors, seen = [], {}
+        for index, isbn in enumerate(isbns):
+            if not isbn:
+                continue
+            normalized = self._normalize_isbn(isbn)
+            if not normalized:
+                errors.append((index, isbn, 'invalid ISBN'))
+            elif normalized in seen:
+                errors.append(
+                    (index, isbn, 'duplicate of row %d' % seen[normalized]))
+            else:
+                seen[normalized] = index
+        existing = self.with_context(active_test=False).search_read(
+            [('isbn_normalized', 'in', list(seen))], ['isbn_normalized'])
+        for row in existing:
+            normalized = row['isbn_normalized']
+            errors.append((seen[normalized], isbns[seen[normalized]],
+                           'already used by book %d' % row['id']))
+        return sorted(errors)
+
+    @api.model
+    def search_isbn(self, isbn):
+        normalized = self._normalize_isbn(isbn)
+        if not normalized:
+            return self.browse()
+        return self.search([('isbn_normalized', '=', normalized)], limit=1)
 
     def button_check_isbn(self):
         for book in self:
@@ -83,7 +153,9 @@ class Book(models.Model):
 
     @api.constrains('isbn')
     def _constrain_isbn_valid(self):
-        for book in self:
-            if book.isbn and not book._check_isbn():
-                raise ValidationError(
-                    '%s is an invalid ISBN' % book.isbn)
+        # Report every invalid ISBN of the batch at once
+        invalid = [book.isbn for book in self
+                   if book.isbn and not book._check_isbn()]
+        if invalid:
+            raise ValidationError(
+                'Invalid ISBNs: %s' % ', '.join(invalid))
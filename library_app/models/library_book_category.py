@@ -20,3 +20,11 @@ class BookCategory(models.Model):
         [('library.book', 'Book'), ('res.partner', 'Author')],
         'Category Highlight',
         )
+
+    def init(self):
+        # child_of searches use parent_path prefixes (LIKE '1/4/%'), which
+        # need a text_pattern_ops index
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS
+            library_book_category_parent_path_prefix_idx
+            ON library_book_category (parent_path text_pattern_ops)""")
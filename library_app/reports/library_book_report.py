@@ -1,16 +1,106 @@
-from odoo import models, fields
+from odoo import api, fields, models
+
+
+class MaterializedReportMixin(models.AbstractModel):
+    """SQL report stored as a plain view or as a materialized view.
+
+    Set the `library_app.report_materialized` system parameter and update
+    the module to switch to materialized views: reports then read a
+    snapshot refreshed by the scheduled job (or `refresh_report`), instead
+    of querying the live book table on every read. Models using it define
+    `_report_query`, returning the SELECT of the report.
+    """
+    _name = 'library.report.materialized.mixin'
+    _description = 'Materialized SQL Report'
+
+    @api.model
+    def _is_materialized(self):
+        param = self.env['ir.config_parameter'].sudo().get_param(
+            'library_app.report_materialized')
+        return param not in (False, '0', 'False', 'false')
+
+    @api.model
+    def _get_relkind(self):
+        "Kind of the report relation in the database: 'v', 'm' or None"
+        self.env.cr.execute(
+            "SELECT relkind FROM pg_class WHERE relname = %s", (self._table,))
+        row = self.env.cr.fetchone()
+        return row and row[0]
+
+    def init(self):
+        if self._abstract or not hasattr(self, '_report_query'):
+            return
+        cr = self.env.cr
+        table = self._table
+        relkind = self._get_relkind()
+        if relkind == 'm':
+            cr.execute('DROP MATERIALIZED VIEW %s CASCADE' % table)
+        elif relkind == 'v':
+            cr.execute('DROP VIEW %s CASCADE' % table)
+        if self._is_materialized():
+            cr.execute('CREATE MATERIALIZED VIEW %s AS (%s)' % (
+                table, self._report_query()))
+            # A unique index is required for concurrent refreshes
+            cr.execute('CREATE UNIQUE INDEX %s_id_idx ON %s (id)' % (
+                table, table))
+        else:
+            cr.execute('CREATE VIEW %s AS (%s)' % (
+                table, self._report_query()))
+
+    @api.model
+    def refresh_report(self):
+        # Check the database rather than the parameter, which may have been
+        # changed without updating the module yet
+        if self._get_relkind() == 'm':
+            # CONCURRENTLY keeps the report readable during the refresh
+            self.env.cr.execute(
+                'REFRESH MATERIALIZED VIEW CONCURRENTLY %s' % self._table)
+            self.invalidate_cache()
+        return True
+
+    @api.model
+    def _cron_refresh_reports(self):
+        for model_name in ('library.book.report',
+                           'library.book.report.publisher'):
+            self.env[model_name].refresh_report()
+        return True
+
 
 class BookReport(models.Model):
     _name = 'library.book.report'
+    _inherit = 'library.report.materialized.mixin'
     _description = 'Book Report'
     _auto = False
     name = fields.Char('Title')
     publisher_id = fields.Many2one('res.partner')
     date_published = fields.Date()
-    
-    def init(self):
-        self.env.cr.execute("""
-        CREATE OR REPLACE VIEW library_book_report AS
-        (SELECT * FROM library_book
-        WHERE active = True)
-        """)
+
+    def _report_query(self):
+        return """
+        SELECT id, name, publisher_id, date_published
+        FROM library_book
+        WHERE active = True
+        """
+
+
+class BookPublisherReport(models.Model):
+    _name = 'library.book.report.publisher'
+    _inherit = 'library.report.materialized.mixin'
+    _description = 'Book Report by Publisher and Year'
+    _auto = False
+    _rec_name = 'publisher_id'
+    publisher_id = fields.Many2one('res.partner')
+    year = fields.Integer()
+    book_count = fields.Integer('Number of Books')
+
+    def _report_query(self):
+        return """
+        SELECT
+            min(id) AS id,
+            publisher_id,
+            date_part('year', date_published)::int AS year,
+            count(*) AS book_count
+        FROM library_book
+        WHERE active = True
+        GROUP BY publisher_id, date_part('year', date_published)
+        """
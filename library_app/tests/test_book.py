@@ -1,3 +1,5 @@
+import io
+
 from odoo.tests.common import TransactionCase
 
 class TestBook(TransactionCase):
@@ -15,3 +17,35 @@ class TestBook(TransactionCase):
     def test_create(self):
         "Test Books are active by default"
         self.assertEqual(self.book_ode.active, True)
+
+    def test_isbn_normalized(self):
+        "ISBNs are stored normalized and found by exact lookup"
+        self.assertEqual(self.book_ode.isbn_normalized, '8791784392796')
+        self.assertEqual(self.Book.search_isbn('8791784392796'), self.book_ode)
+
+    def test_validate_isbns(self):
+        "Batch validation reports all bad rows at once"
+        errors = self.Book.validate_isbns([
+            '978-0-306-40615-7',
+            '978-0-306-40615-0',
+            '9780306406157',
+            '879-1-78439-279-6',
+        ])
+        self.assertEqual([e[0] for e in errors], [1, 2, 3])
+
+    def test_loader_skips_bad_rows(self):
+        "The bulk loader leaves out books breaking a book constraint"
+        stream = io.StringIO(
+            'id,name,date_published,isbn\n'
+            'test_load_ok,Loaded Book,2018-01-01,978-0-306-40615-7\n'
+            'test_load_bad,Bad ISBN Book,,978-0-306-40615-0\n'
+            'test_load_used,Used ISBN Book,,879-1-78439-279-6\n'
+            'test_load_future,Future Book,2999-01-01,\n'
+            'test_load_twice,Loaded Book,2018-01-01,\n')
+        self.env['library.book.loader']._load_books(stream)
+        self.assertTrue(self.env.ref(
+            'library_app.test_load_ok', raise_if_not_found=False))
+        for xmlid in ['test_load_bad', 'test_load_used',
+                      'test_load_future', 'test_load_twice']:
+            self.assertFalse(self.env.ref(
+                'library_app.' + xmlid, raise_if_not_found=False))
@@ -8,6 +8,9 @@
         'views/library_menu.xml',
         'views/checkout_view.xml',
         'views/checkout_kanban_view.xml',
+        'views/checkout_message_job_view.xml',
+        'wizard/checkout_mass_message_wizard_view.xml',
         'data/library_checkout_stage.xml',
+        'data/library_checkout_cron.xml',
     ],
 }
\ No newline at end of file
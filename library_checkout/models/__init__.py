@@ -1,2 +1,4 @@
 from . import library_checkout_stage
 from . import library_checkout
+from . import library_checkout_message_job
+from . import library_book
@@ -0,0 +1,35 @@
+from odoo import api, fields, models
+
+
+class Book(models.Model):
+    _inherit = 'library.book'
+
+    checkout_line_ids = fields.One2many(
+        'library.checkout.line',
+        'book_id',
+        string='Checkout Lines')
+    is_available = fields.Boolean(
+        compute='_compute_is_available',
+        store=True)
+
+    @api.depends('copies', 'checkout_line_ids.checkout_id.stage_id.state')
+    def _compute_is_available(self):
+        # Count borrowed copies for all books with one grouped query
+        groups = self.env['library.checkout.line'].read_group(
+            [('book_id', 'in', self.ids),
+             ('checkout_id.stage_id.state', '=', 'open')],
+            ['book_id'],
+            ['book_id'])
+        borrowed = {
+            group['book_id'][0]: group['book_id_count']
+            for group in groups}
+        for book in self:
+            book.is_available = book.copies > borrowed.get(book.id, 0)
+
+    def init(self):
+        # Partial index: "available books" lists only scan available rows
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS library_book_available_idx
+            ON library_book (name, date_published)
+            WHERE is_available AND active
+            """)
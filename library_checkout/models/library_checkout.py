@@ -1,4 +1,4 @@
-from odoo import api, exceptions, fields, models
+from odoo import api, exceptions, fields, models, tools
 
 
 class Checkout(models.Model):
@@ -70,12 +70,23 @@ class Checkout(models.Model):
             book.num_books = len(book.line_ids)
 
     def _compute_num_other_checkouts(self):
+        # One grouped query for the whole recordset, instead of
+        # a search_count per checkout
+        members = self.mapped('member_id')
+        groups = self.read_group(
+            [('member_id', 'in', members.ids),
+             ('state', 'in', ['open'])],
+            ['member_id'],
+            ['member_id'])
+        open_counts = {
+            group['member_id'][0]: group['member_id_count']
+            for group in groups}
         for rec in self:
-            domain = [
-                ('member_id', '=', checkout.rec.id),
-                ('state', 'in', ['open']),
-                ('id', '!=', rec.id)]
-            rec.num_other_checkouts = self.search_count(domain)
+            count = open_counts.get(rec.member_id.id, 0)
+            # Do not count the checkout itself
+            if isinstance(rec.id, int) and rec.state == 'open':
+                count -= 1
+            rec.num_other_checkouts = count
 
     @api.onchange('member_id')
     def onchange_member_id(self):
@@ -93,8 +104,8 @@ class Checkout(models.Model):
     def create(self, vals):
         # Code before create: should use the `vals` dict
         if 'stage_id' in vals:
-            Stage = self.env['library.checkout.stage']
-            new_state = Stage.browse(vals['stage_id']).state
+            state_map = self.env['library.checkout.stage']._get_state_map()
+            new_state = state_map.get(vals['stage_id'])
             if new_state == 'open':
                 vals['checkout_date'] = fields.Date.today()
         new_record = super().create(vals)
@@ -107,30 +118,88 @@ class Checkout(models.Model):
     @api.multi
     def write(self, vals):
         # Code before write: can use `self`, with the old values
-        if 'stage_id' in vals:
-            Stage = self.env['library.checkout.stage']
-            new_state = Stage.browse(vals['stage_id']).state
-            if new_state == 'open' and self.state != 'open':
-                vals['checkout_date'] = fields.Date.today()
-            if new_state == 'done' and self.state != 'done':
-                vals['close_date'] = fields.Date.today()
-        super().write(vals)
+        if 'stage_id' not in vals:
+            return super().write(vals)
+        state_map = self.env['library.checkout.stage']._get_state_map()
+        new_state = state_map.get(vals['stage_id'])
+        date_field = {
+            'open': 'checkout_date',
+            'done': 'closed_date',
+        }.get(new_state)
+        if not date_field:
+            return super().write(vals)
+        # Only checkouts entering the new state get the date set, so
+        # the recordset is written in at most two groups
+        entering = self.filtered(
+            lambda r: state_map.get(r.stage_id.id) != new_state)
+        staying = self - entering
+        if staying:
+            super(Checkout, staying).write(vals)
+        if entering:
+            super(Checkout, entering).write(
+                dict(vals, **{date_field: fields.Date.today()}))
         # Code after write: can use `self`, with the updated values
         return True
 
     def button_done(self):
-        Stage = self.env['library.checkout.stage']
-        done_stage = Stage.search(
-            [('state', '=', 'done')],
-            limit=1)
-        for checkout in self:
-            checkout.stage_id = done_stage
+        self.move_to_state('done')
         return True
 
+    @api.multi
+    @api.returns('self')
+    def move_to_state(self, state):
+        """Move all checkouts to the first stage in `state` at once.
+
+        Uses a single write for the whole recordset and logs the stage
+        change with one batched note insert, instead of a write and a
+        message_post per checkout. Returns the checkouts moved, as ids
+        for RPC callers.
+        """
+        Stage = self.env['library.checkout.stage']
+        stage = Stage.search([('state', '=', state)], limit=1)
+        if not stage:
+            raise exceptions.UserError(
+                'There is no stage for the %s state.' % state)
+        to_move = self.filtered(lambda r: r.stage_id != stage)
+        if to_move:
+            to_move.with_context(tracking_disable=True).write(
+                {'stage_id': stage.id})
+            to_move._log_stage_change(stage)
+        return to_move
+
+    @api.multi
+    def _log_stage_change(self, stage):
+        body = '<p>Stage changed to %s</p>' % tools.html_escape(stage.name)
+        message_ids = [
+            tools.generate_tracking_message_id('%s-%s' % (self._name, res_id))
+            for res_id in self.ids]
+        self.env.cr.execute("""
+            INSERT INTO mail_message (
+                model, res_id, message_type, subtype_id, body,
+                author_id, record_name, date, message_id,
+                create_uid, create_date, write_uid, write_date)
+            SELECT
+                %(model)s, res_id, 'notification', %(subtype_id)s, %(body)s,
+                %(author_id)s, NULL, now() at time zone 'UTC', message_id,
+                %(uid)s, now() at time zone 'UTC',
+                %(uid)s, now() at time zone 'UTC'
+            FROM unnest(%(res_ids)s::int[], %(message_ids)s::varchar[])
+                AS m (res_id, message_id)
+            """, {
+                'model': self._name,
+                'subtype_id': self.env.ref('mail.mt_note').id,
+                'body': body,
+                'author_id': self.env.user.partner_id.id,
+                'uid': self.env.uid,
+                'res_ids': self.ids,
+                'message_ids': message_ids,
+            })
+        self.invalidate_cache(['message_ids'], self.ids)
+
 
 class CheckoutLine(models.Model):
     _name = 'library.checkout.line'
     _description = 'Borrow Request Line'
 
-    checkout_id = fields.Many2one('library.checkout')
-    book_id = fields.Many2one('library.book')
+    checkout_id = fields.Many2one('library.checkout', index=True)
+    book_id = fields.Many2one('library.book', index=True)
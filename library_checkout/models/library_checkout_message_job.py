@@ -0,0 +1,106 @@
+import logging
+import threading
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+
+class CheckoutMessageJob(models.Model):
+    _name = 'library.checkout.message.job'
+    _description = 'Queued Message to Borrowers'
+    _order = 'id'
+
+    message_subject = fields.Char()
+    message_body = fields.Html()
+    checkout_ids = fields.Many2many(
+        'library.checkout',
+        'library_checkout_message_job_checkout_rel',
+        string='Checkouts')
+    pending_checkout_ids = fields.Many2many(
+        'library.checkout',
+        'library_checkout_message_job_pending_rel',
+        string='Pending Checkouts')
+    chunk_size = fields.Integer(default=200)
+    sent_count = fields.Integer(readonly=True)
+    total_count = fields.Integer(readonly=True)
+    progress = fields.Float(compute='_compute_progress')
+    state = fields.Selection(
+        [('queued', 'Queued'),
+         ('done', 'Done'),
+         ('failed', 'Failed')],
+        default='queued',
+        readonly=True)
+    error = fields.Text(readonly=True)
+
+    @api.depends('sent_count', 'total_count')
+    def _compute_progress(self):
+        for job in self:
+            job.progress = (
+                100.0 * job.sent_count / job.total_count
+                if job.total_count else 0.0)
+
+    @api.model
+    def create(self, vals):
+        job = super().create(vals)
+        job.write({
+            'pending_checkout_ids': [(6, 0, job.checkout_ids.ids)],
+            'total_count': len(job.checkout_ids),
+        })
+        return job
+
+    @api.multi
+    def button_resume(self):
+        self.filtered(lambda j: j.state == 'failed').write(
+            {'state': 'queued', 'error': False})
+        return True
+
+    @api.multi
+    def _process_chunk(self):
+        "Post the message on the next chunk of pending checkouts"
+        self.ensure_one()
+        chunk = self.pending_checkout_ids[:self.chunk_size or 200]
+        # Post as the librarian who queued the message, like the wizard
+        # does, and queue the emails for the mail cron instead of sending
+        # them while posting. Unlike the stage change notes of
+        # `_log_stage_change`, these messages must notify the followers,
+        # so they can't be inserted in SQL.
+        author = self.create_uid
+        for checkout in chunk.sudo(author).with_context(
+                mail_notify_force_send=False):
+            checkout.message_post(
+                body=self.message_body,
+                subject=self.message_subject,
+                subtype='mail.mt_comment',
+            )
+        vals = {
+            'pending_checkout_ids': [(3, c.id) for c in chunk],
+            'sent_count': self.sent_count + len(chunk),
+        }
+        if chunk == self.pending_checkout_ids:
+            vals['state'] = 'done'
+        self.write(vals)
+
+    @api.model
+    def _cron_process_jobs(self):
+        auto_commit = not getattr(threading.currentThread(), 'testing', False)
+        for job in self.search([('state', '=', 'queued')]):
+            while job.state == 'queued':
+                try:
+                    job._process_chunk()
+                except Exception as e:
+                    if not auto_commit:
+                        raise
+                    # Keep the chunks already sent, retry this one on resume
+                    self.env.cr.rollback()
+                    self.invalidate_cache()
+                    _logger.exception(
+                        'Queued message %d failed after %d of %d checkouts',
+                        job.id, job.sent_count, job.total_count)
+                    job.write({'state': 'failed', 'error': str(e)})
+                if auto_commit:
+                    self.env.cr.commit()
+            _logger.info(
+                'Queued message %d: posted to %d of %d checkouts',
+                job.id, job.sent_count, job.total_count)
+        return True
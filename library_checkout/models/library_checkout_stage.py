@@ -1,4 +1,4 @@
-from odoo import fields, models
+from odoo import api, fields, models, tools
 
 
 class CheckoutStage(models.Model):
@@ -16,4 +16,27 @@ class CheckoutStage(models.Model):
          ('done','Returned'),
          ('cancel', 'Cancelled')],
         default='new',
-    )
\ No newline at end of file
+    )
+
+    @api.model
+    @tools.ormcache()
+    def _get_state_map(self):
+        "Map of stage id to state, cached until stages change"
+        stages = self.sudo().with_context(active_test=False).search([])
+        return {stage.id: stage.state for stage in stages}
+
+    @api.model
+    def create(self, vals):
+        self.clear_caches()
+        return super().create(vals)
+
+    @api.multi
+    def write(self, vals):
+        if 'state' in vals:
+            self.clear_caches()
+        return super().write(vals)
+
+    @api.multi
+    def unlink(self):
+        self.clear_caches()
+        return super().unlink()
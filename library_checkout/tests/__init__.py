@@ -1,2 +1,2 @@
 from . import test_checkout_mass_message
-
+from . import test_checkout
@@ -0,0 +1,70 @@
+from odoo.tests.common import TransactionCase
+
+
+class TestCheckout(TransactionCase):
+
+    def setUp(self, *args, **kwargs):
+        super().setUp(*args, **kwargs)
+        admin_user = self.env.ref('base.user_admin')
+        self.Checkout = self.env['library.checkout'].sudo(admin_user)
+        self.stage_open = self.env.ref('library_checkout.stage_20')
+        self.member = self.env['library.member'].create({'name': 'John'})
+
+    def test_num_other_checkouts(self):
+        "Other open checkouts are counted per member"
+        checkouts = self.Checkout.browse()
+        for __ in range(3):
+            checkouts |= self.Checkout.create({
+                'member_id': self.member.id,
+                'stage_id': self.stage_open.id})
+        draft = self.Checkout.create({'member_id': self.member.id})
+        self.assertEqual(
+            checkouts.mapped('num_other_checkouts'), [2, 2, 2])
+        self.assertEqual(draft.num_other_checkouts, 3)
+
+    def test_write_multi_stage(self):
+        "Moving several checkouts to open sets the date only when entering"
+        already_open = self.Checkout.create({
+            'member_id': self.member.id,
+            'stage_id': self.stage_open.id})
+        already_open.checkout_date = '2018-01-01'
+        drafts = self.Checkout.create({'member_id': self.member.id})
+        drafts |= self.Checkout.create({'member_id': self.member.id})
+        (already_open | drafts).write({'stage_id': self.stage_open.id})
+        self.assertEqual(
+            str(already_open.checkout_date), '2018-01-01')
+        for checkout in drafts:
+            self.assertEqual(checkout.state, 'open')
+            self.assertTrue(checkout.checkout_date)
+
+    def test_move_to_state(self):
+        "Moving checkouts in bulk closes them and logs one note each"
+        checkouts = self.Checkout.browse()
+        for __ in range(3):
+            checkouts |= self.Checkout.create({
+                'member_id': self.member.id,
+                'stage_id': self.stage_open.id})
+        msgs_before = [len(c.message_ids) for c in checkouts]
+        moved = checkouts.move_to_state('done')
+        self.assertEqual(moved, checkouts)
+        msgs_after = [len(c.message_ids) for c in checkouts]
+        self.assertEqual(msgs_after, [n + 1 for n in msgs_before])
+        for checkout in checkouts:
+            self.assertEqual(checkout.state, 'done')
+            self.assertTrue(checkout.closed_date)
+
+    def test_book_availability(self):
+        "Books are unavailable while all their copies are borrowed"
+        book = self.env['library.book'].create({
+            'name': 'Odoo Development Essentials', 'copies': 1})
+        self.assertTrue(book.is_available)
+        checkout = self.Checkout.create({
+            'member_id': self.member.id,
+            'stage_id': self.stage_open.id,
+            'line_ids': [(0, 0, {'book_id': book.id})]})
+        self.assertFalse(book.is_available)
+        book.copies = 2
+        self.assertTrue(book.is_available)
+        book.copies = 1
+        checkout.move_to_state('done')
+        self.assertTrue(book.is_available)
@@ -35,3 +35,26 @@ class TestWizard(TransactionCase):
         wizard0 = self.Wizard.create({})
         with self.assertRaises(exceptions.UserError) as e:
             wizard0.button_send()
+
+    def test_button_send_background(self):
+        "Background send queues a job posted in chunks by the cron"
+        msgs_before = len(self.checkout0.message_ids)
+        Wizard0 = self.Wizard.with_context(active_ids=self.checkout0.ids)
+        wizard0 = Wizard0.create({
+            'message_body': 'Hello',
+            'send_in_background': True})
+        wizard0.button_send()
+        self.assertEqual(len(self.checkout0.message_ids), msgs_before)
+
+        Job = self.env['library.checkout.message.job']
+        job = Job.search([], order='id desc', limit=1)
+        self.assertEqual(job.state, 'queued')
+        Job._cron_process_jobs()
+        self.assertEqual(job.state, 'done')
+        self.assertEqual(job.progress, 100.0)
+        self.assertEqual(
+            len(self.checkout0.message_ids), msgs_before + 1)
+        self.assertEqual(
+            self.checkout0.message_ids[0].author_id,
+            self.env.ref('base.user_admin').partner_id,
+            'Expected the message authored by the user who queued it.')
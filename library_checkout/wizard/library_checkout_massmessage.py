@@ -8,9 +8,14 @@ class CheckoutMassMessage(models.TransientModel):
     _description = 'Send Message to Borrowers'
     checkout_ids = fields.Many2many(
         'library.checkout',
-        string='Checkouts')
+        string='Checkouts',
+        default=lambda s: s.env.context.get('active_ids'))
     message_subject = fields.Char()
     message_body = fields.Html()
+    send_in_background = fields.Boolean(
+        help='Post the messages in chunks from a scheduled job, '
+             'for large selections.')
+    chunk_size = fields.Integer(default=200)
 
     @api.multi
     def button_send(self):
@@ -21,6 +26,19 @@ class CheckoutMassMessage(models.TransientModel):
         if not self.message_body:
             raise exceptions.UserError(
                 'Write a message body to send.')
+        if self.send_in_background:
+            job = self.env['library.checkout.message.job'].create({
+                'message_subject': self.message_subject,
+                'message_body': self.message_body,
+                'checkout_ids': [(6, 0, self.checkout_ids.ids)],
+                'chunk_size': self.chunk_size,
+            })
+            _logger.info(
+                'Queued message %d for %d Checkouts',
+                job.id,
+                len(self.checkout_ids),
+                )
+            return True
         for checkout in self.checkout_ids:
             _logger.debug(
                 'Message on %d to followers: %s',
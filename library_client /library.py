@@ -1,19 +1,73 @@
+import asyncio
+import sys
+import time
 from argparse import ArgumentParser
+import library_bulk
 from library_api import LibraryAPI
+from library_async import AsyncLibraryAPI
 
 parser = ArgumentParser()
 parser.add_argument(
     'command',
-    choices=['list', 'add', 'set', 'del'])
+    choices=['list', 'add', 'set', 'del', 'import', 'export'])
 parser.add_argument('params', nargs='*') # optional args
+parser.add_argument(
+    '--page-size', type=int, default=1000,
+    help='Number of books fetched per request by the list command.')
+parser.add_argument(
+    '--async', dest='use_async', action='store_true',
+    help='Run add/del calls concurrently.')
+parser.add_argument(
+    '--concurrency', type=int, default=4,
+    help='Maximum number of concurrent requests with --async.')
+parser.add_argument(
+    '--format', choices=['csv', 'jsonl'],
+    help='File format for import/export (default: from file extension).')
+parser.add_argument(
+    '--chunk-size', type=int, default=500,
+    help='Number of books created per request by the import command.')
 args = parser.parse_args()
 
 srv, port, db = 'localhost', 8069, 'dev12'
 user, pwd = 'admin', 'admin'
 api = LibraryAPI(srv, port, db, user, pwd)
 
+
+async def run_async(command, params):
+    async_api = AsyncLibraryAPI(
+        srv, port, db, user, pwd, concurrency=args.concurrency)
+    try:
+        if command == 'add':
+            results = await async_api.map(
+                async_api.create, params, return_exceptions=True)
+            for title, result in zip(params, results):
+                if isinstance(result, Exception):
+                    print('Failed to add book %s: %s' % (title, result),
+                          file=sys.stderr)
+                else:
+                    print('Book added with ID %d.' % result)
+        if command == 'del':
+            results = await async_api.map(
+                async_api.unlink, [int(p) for p in params],
+                return_exceptions=True)
+            for param, result in zip(params, results):
+                if isinstance(result, Exception):
+                    print('Failed to delete book %s: %s' % (param, result),
+                          file=sys.stderr)
+                else:
+                    print('Book with ID %s deleted.' % param)
+    finally:
+        async_api.close()
+
+
+if args.use_async and args.command in ('add', 'del'):
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(run_async(args.command, args.params))
+    parser.exit()
+
 if args.command == 'list':
-    books = api.search_read(args.text)
+    text = args.params[0] if args.params else None
+    books = api.search_read_iter(text, page_size=args.page_size)
     for book in books:
         print('%(id)d %(name)s' % book)
 
@@ -22,15 +76,46 @@ if args.command == 'add':
         new_id = api.create(title)
         print('Book added with ID %d.' % new_id)
 
-if args.command == 'set-title':
-    if len(params) != 2:
-        print("set command requires a Title and ID.")
-        return
-    book_id title = int(args.params[0]), args.params[1]
+if args.command == 'set':
+    if len(args.params) != 2:
+        parser.error("set command requires an ID and a Title.")
+    book_id, title = int(args.params[0]), args.params[1]
     api.write(title, book_id)
     print('Title set for Book ID %d.' % book_id)
 
 if args.command == 'del':
-    for param in params:
+    for param in args.params:
         api.unlink(int(param))
-        print('Book with ID %s deleted.' % param)
\ No newline at end of file
+        print('Book with ID %s deleted.' % param)
+
+if args.command in ('import', 'export'):
+    path = args.params[0] if args.params else '-'
+    fmt = args.format or library_bulk.guess_format(path)
+    start = time.time()
+    if args.command == 'import':
+        stream = library_bulk.open_input(path)
+        try:
+            count, errors = library_bulk.import_books(
+                api, stream, fmt, args.chunk_size)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        for error in errors:
+            print('Failed batch of %d books: %s' % (
+                len(error.items), error.error), file=sys.stderr)
+    else:
+        stream = library_bulk.open_output(path)
+        try:
+            count = library_bulk.export_books(
+                api, stream, fmt, args.page_size)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+    elapsed = time.time() - start
+    # Keep stdout clean for the exported data
+    print('%sed %d rows in %.2fs (%.0f rows/s).' % (
+        args.command.capitalize(), count, elapsed,
+        count / elapsed if elapsed else 0), file=sys.stderr)
+    if args.command == 'import' and errors:
+        print('Failed to import %d rows.' % sum(
+            len(error.items) for error in errors), file=sys.stderr)
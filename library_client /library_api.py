@@ -1,13 +1,199 @@
+import select
+from collections import OrderedDict, namedtuple
+from http import client as http_client
+from queue import Empty, LifoQueue
+from threading import Lock
 from xmlrpc import client
 
+
+class PooledTransport(client.Transport):
+    """XML-RPC transport keeping a pool of keep-alive HTTP connections.
+
+    A single instance can be shared by several ServerProxy objects (and
+    threads): each request borrows an idle connection to the target host,
+    or opens a new one, and gives it back once the response is read.
+    """
+
+    def __init__(self, pool_size=4, timeout=None, **kwargs):
+        super().__init__(**kwargs)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._pools = {}
+        self._lock = Lock()
+
+    def _get_pool(self, host):
+        with self._lock:
+            if host not in self._pools:
+                self._pools[host] = LifoQueue(maxsize=self.pool_size)
+            return self._pools[host]
+
+    def _acquire(self, host):
+        pool = self._get_pool(host)
+        while True:
+            try:
+                conn = pool.get_nowait()
+            except Empty:
+                chost, self._extra_headers, x509 = self.get_host_info(host)
+                return http_client.HTTPConnection(
+                    chost, timeout=self.timeout), False
+            # An idle connection with pending data has been closed by the
+            # server: drop it rather than sending a request on it.
+            if conn.sock is None or select.select([conn.sock], [], [], 0)[0]:
+                conn.close()
+                continue
+            return conn, True
+
+    def _release(self, host, conn):
+        try:
+            self._get_pool(host).put_nowait(conn)
+        except Exception:
+            conn.close()
+
+    def request(self, host, handler, request_body, verbose=False):
+        # A pooled connection may still have been dropped by the server
+        # while idle: retry once on a fresh connection, but only if the
+        # request could not be sent. Once sent, the server may have run it
+        # (e.g. a `create`), so a retry could apply it twice.
+        while True:
+            conn, reused = self._acquire(host)
+            conn.set_debuglevel(verbose)
+            headers = dict(self._extra_headers or [])
+            headers.update({
+                'Content-Type': 'text/xml',
+                'User-Agent': self.user_agent,
+            })
+            try:
+                conn.request('POST', handler, request_body, headers)
+            except ConnectionError:
+                conn.close()
+                if reused:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            try:
+                resp = conn.getresponse()
+            except Exception:
+                conn.close()
+                raise
+            break
+        if resp.status != 200:
+            resp.read()
+            conn.close()
+            raise client.ProtocolError(
+                host + handler, resp.status, resp.reason,
+                dict(resp.getheaders()))
+        self.verbose = verbose
+        try:
+            # A Fault is raised here only once the body has been read,
+            # so the connection can still be reused.
+            return self.parse_response(resp)
+        finally:
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(host, conn)
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            while not pool.empty():
+                pool.get_nowait().close()
+
+
+BatchError = namedtuple('BatchError', 'method items error')
+
+
+class LibraryBatch():
+    """Queue `create`/`write`/`unlink` calls and send them in batches.
+
+    Odoo has no XML-RPC multicall, so consecutive calls of the same kind are
+    merged into a single `execute_kw`: creates use a list of values and
+    unlinks use a list of ids. Writes can only be merged when they set the
+    same values, so writes with different values (e.g. different titles)
+    still cost one request each. A failing request is recorded in `errors`
+    with the items it carried, and the remaining requests are still sent.
+    """
+
+    def __init__(self, api, batch_size):
+        self.api = api
+        self.batch_size = batch_size
+        self.method = None
+        self.pending = []
+        self.results = []
+        self.errors = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        return False
+
+    def _queue(self, method, item):
+        if method != self.method:
+            self.flush()
+            self.method = method
+        self.pending.append(item)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def create(self, title):
+        self.create_vals({'name': title})
+
+    def create_vals(self, vals):
+        self._queue('create', vals)
+
+    def write(self, title, id):
+        self._queue('write', (id, {'name': title}))
+
+    def unlink(self, id):
+        self._queue('unlink', id)
+
+    def _requests(self, items):
+        "Split `items` into (items, execute_kw args) pairs, one per request"
+        if self.method == 'write':
+            items_by_vals = OrderedDict()
+            for item in items:
+                key = tuple(sorted(item[1].items()))
+                items_by_vals.setdefault(key, []).append(item)
+            return [(group, [[id for id, vals in group], dict(key)])
+                    for key, group in items_by_vals.items()]
+        return [(items, [items])]
+
+    def _send(self, items, args):
+        try:
+            result = self.api.execute(self.method, args)
+        except (client.Fault, client.ProtocolError, OSError) as e:
+            self.errors.append(BatchError(self.method, items, e))
+        else:
+            self.results.append((self.method, result))
+
+    def flush(self):
+        items, self.pending = self.pending, []
+        if not items:
+            return
+        for group, args in self._requests(items):
+            self._send(group, args)
+
+
 class LibraryAPI():
-    def __init__(self, srv, port, db, user, pwd):
-        common = client.ServerProxy('http://%s:%d/xmlrpc/2/common' % (srv, port))
-        self.api = client.ServerProxy('http://%s:%d/xmlrpc/2/object' % (srv, port))
+    def __init__(self, srv, port, db, user, pwd, pool_size=4, batch_size=500):
+        self.transport = PooledTransport(pool_size)
+        common = client.ServerProxy(
+            'http://%s:%d/xmlrpc/2/common' % (srv, port),
+            transport=self.transport)
+        self.api = client.ServerProxy(
+            'http://%s:%d/xmlrpc/2/object' % (srv, port),
+            transport=self.transport)
         self.uid = common.authenticate(db, user, pwd, {})
         self.pwd = pwd
         self.db = db
         self.model = 'library.book'
+        self.batch_size = batch_size
 
     def execute(self, method, arg_list, kwarg_dict=None):
         return self.api.execute_kw(
@@ -18,6 +204,22 @@ class LibraryAPI():
         fields = ['id', 'name']
         return self.execute('search_read', [domain, fields])
 
+    def search_read_iter(self, text=None, page_size=1000, fields=None):
+        # Keyset pagination: each page starts after the last id seen, so
+        # the server never has to skip rows as an OFFSET would.
+        domain = [('name','ilike', text)] if text else []
+        fields = fields or ['id', 'name']
+        last_id = 0
+        while True:
+            page = self.execute(
+                'search_read',
+                [domain + [('id', '>', last_id)], fields],
+                {'order': 'id', 'limit': page_size})
+            yield from page
+            if len(page) < page_size:
+                return
+            last_id = page[-1]['id']
+
     def create(self, title):
         vals = {'name': title}
         return self.execute('create', [vals])
@@ -29,10 +231,16 @@ class LibraryAPI():
     def unlink(self, id):
         return self.execute('unlink', [[id]])
 
+    def batch(self, batch_size=None):
+        return LibraryBatch(self, batch_size or self.batch_size)
+
+    def close(self):
+        self.transport.close()
+
 if __name__ == '__main__':
     # Sample test configurations
     srv, db, port = 'localhost' , 'dev12' , 8069
     user, pwd = 'admin', 'admin'
     api = LibraryAPI(srv, port, db, user, pwd)
     from pprint import pprint
-    pprint(api.search_read())
\ No newline at end of file
+    pprint(api.search_read())
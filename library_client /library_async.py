@@ -0,0 +1,77 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from library_api import LibraryAPI
+
+
+class AsyncLibraryAPI():
+    """asyncio flavour of LibraryAPI with a bounded number of requests.
+
+    Calls run on a thread pool sharing the pooled keep-alive transport of a
+    LibraryAPI, so at most `concurrency` requests are in flight, each on its
+    own connection. `map` adds backpressure for bulk jobs: it stops pulling
+    new items from its input while `concurrency * 2` calls are pending.
+    """
+
+    def __init__(self, srv, port, db, user, pwd, concurrency=4):
+        self.concurrency = concurrency
+        self.sync_api = LibraryAPI(
+            srv, port, db, user, pwd, pool_size=concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._semaphore = None
+
+    @property
+    def semaphore(self):
+        # Created lazily so it belongs to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def execute(self, method, arg_list, kwarg_dict=None):
+        async with self.semaphore:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(
+                self.executor, self.sync_api.execute,
+                method, arg_list, kwarg_dict)
+
+    async def search_read(self, text=None):
+        domain = [('name','ilike', text)] if text else []
+        fields = ['id', 'name']
+        return await self.execute('search_read', [domain, fields])
+
+    async def create(self, title):
+        vals = {'name': title}
+        return await self.execute('create', [vals])
+
+    async def write(self, title, id):
+        vals = {'name': title}
+        return await self.execute('write', [[id], vals])
+
+    async def unlink(self, id):
+        return await self.execute('unlink', [[id]])
+
+    async def map(self, func, items, return_exceptions=False):
+        """Call the coroutine function `func` on each item.
+
+        Results are returned in input order. With `return_exceptions`, a
+        failed call gives its exception in place of its result; otherwise
+        the first error is raised once all started calls are done.
+        """
+        max_pending = self.concurrency * 2
+        tasks, pending = [], set()
+        for item in items:
+            if len(pending) >= max_pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+            task = asyncio.ensure_future(func(item))
+            tasks.append(task)
+            pending.add(task)
+        if pending:
+            await asyncio.wait(pending)
+        if return_exceptions:
+            return [task.exception() or task.result() for task in tasks]
+        return [task.result() for task in tasks]
+
+    def close(self):
+        self.executor.shutdown()
+        self.sync_api.close()
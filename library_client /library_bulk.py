@@ -0,0 +1,70 @@
+import csv
+import json
+import sys
+
+EXPORT_FIELDS = ['id', 'name', 'isbn', 'date_published']
+
+
+def guess_format(path, default='csv'):
+    if path.endswith('.jsonl') or path.endswith('.json'):
+        return 'jsonl'
+    if path.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def open_input(path):
+    if path == '-':
+        return sys.stdin
+    return open(path, newline='', encoding='utf-8')
+
+
+def open_output(path):
+    if path == '-':
+        return sys.stdout
+    return open(path, 'w', newline='', encoding='utf-8')
+
+
+def read_rows(stream, fmt):
+    if fmt == 'jsonl':
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        for row in csv.DictReader(stream):
+            # Empty CSV cells mean "not set", not an empty string
+            yield {k: v for k, v in row.items() if v != ''}
+
+
+def import_books(api, stream, fmt, chunk_size):
+    """Create a book for each input row, `chunk_size` books per request.
+
+    Returns the number of books created and the list of failed batches.
+    """
+    count = 0
+    with api.batch(chunk_size) as batch:
+        for vals in read_rows(stream, fmt):
+            vals.pop('id', None)
+            batch.create_vals(vals)
+            count += 1
+    failed = sum(len(error.items) for error in batch.errors)
+    return count - failed, batch.errors
+
+
+def export_books(api, stream, fmt, page_size, fields=None):
+    """Stream all books to `stream`, returning the number of rows written."""
+    fields = fields or EXPORT_FIELDS
+    rows = api.search_read_iter(page_size=page_size, fields=fields)
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, fields, extrasaction='ignore')
+        writer.writeheader()
+    count = 0
+    for row in rows:
+        if fmt == 'jsonl':
+            stream.write(json.dumps(row) + '\n')
+        else:
+            # Odoo returns False for empty values
+            writer.writerow({k: '' if v is False else v
+                             for k, v in row.items()})
+        count += 1
+    return count
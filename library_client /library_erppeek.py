@@ -18,6 +18,21 @@ class LibraryAPI():
         fields = ['id', 'name']
         return self.Client.read(self.model, domain, fields)
 
+    def search_read_iter(self, text=None, page_size=1000, fields=None):
+        # Keyset pagination: each page starts after the last id seen, so
+        # the server never has to skip rows as an OFFSET would.
+        domain = [('name','ilike', text)] if text else []
+        fields = fields or ['id', 'name']
+        last_id = 0
+        while True:
+            page = self.Client.read(
+                self.model, domain + [('id', '>', last_id)], fields,
+                order='id', limit=page_size)
+            yield from page
+            if len(page) < page_size:
+                return
+            last_id = page[-1]['id']
+
     def create(self, title):
         vals = {'name': title}
         return self.Client.create(self.model, vals)
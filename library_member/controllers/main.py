@@ -1,12 +1,9 @@
-from odoo import http
 from odoo.addons.library_app.controllers.main import Books
 
 class BooksExtended(Books):
-    @http.route()
-    def list(self, **kwargs):
-        response = super().list(**kwargs)
+
+    def _get_book_domain(self, **kwargs):
+        domain = super()._get_book_domain(**kwargs)
         if kwargs.get('available'):
-            Book = http.request.env['library.book']
-            books = Book.search([('is_available', '=', True)])
-            response.qcontext['books'] = books
-        return response
+            domain += [('is_available', '=', True)]
+        return domain
@@ -1,16 +1,15 @@
-from odoo import fields, models
+from odoo import api, fields, models
 
 class Book(models.Model):
     _inherit = 'library.book'
     is_available = fields.Boolean('Is Available?')
 
-    def _check_isbn(self):
-        self.ensure_one()
-        digits = [int(x) for x in self.isbn if x.isdigit()]
+    @api.model
+    def _is_valid_isbn_digits(self, digits):
         if len(digits) == 10:
             ponderators = [1, 2, 3, 4, 5, 6, 7, 8, 9]
             total = sum(a * b for a, b in zip(digits[:9], ponderators))
             check = total % 11
             return digits[-1] == check
         else:
-            return super()._check_isbn()
+            return super()._is_valid_isbn_digits(digits)
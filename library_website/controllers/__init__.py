@@ -1 +1,2 @@
 from . import hello
+from . import main
@@ -2,13 +2,43 @@ from odoo import http
 from odoo.http import request
 
 class Main(http.Controller):
-    @http.route('/checkouts', auth='user', website=True)
-    def checkouts(self, **kwargs):
+    _checkouts_per_page = 20
+
+    @http.route(['/checkouts', '/checkouts/page/<int:page>'],
+                auth='user', website=True)
+    def checkouts(self, page=1, stage=None, member=None, **kwargs):
         Checkout = request.env['library.checkout']
-        checkouts = Checkout.search([])
+        stage = int(stage) if stage and stage.isdigit() else None
+        member = int(member) if member and member.isdigit() else None
+        domain, url_args = [], {}
+        if stage:
+            domain.append(('stage_id', '=', stage))
+            url_args['stage'] = stage
+        if member:
+            domain.append(('member_id', '=', member))
+            url_args['member'] = member
+        pager = request.website.pager(
+            url='/checkouts',
+            url_args=url_args,
+            total=Checkout.search_count(domain),
+            page=page,
+            step=self._checkouts_per_page)
+        checkouts = Checkout.search(
+            domain,
+            order='id desc',
+            limit=self._checkouts_per_page,
+            offset=pager['offset'])
+        # Load only what the template shows, in one query per model
+        checkouts.read(['request_date', 'stage_id', 'member_id'])
+        checkouts.mapped('stage_id').read(['name', 'fold'])
+        checkouts.mapped('member_id').read(['name'])
         return request.render(
             'library_website.index',
-            {'docs': checkouts})
+            {'docs': checkouts,
+             'pager': pager,
+             'stages': request.env['library.checkout.stage'].search([]),
+             'stage': stage,
+             'member': member})
     
     @http.route('/checkout/<model("library.checkout"):doc>',
     auth="user", # default, but made explicit here
@@ -0,0 +1,119 @@
+import logging
+import time
+from datetime import datetime
+
+_logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 50000
+
+# Formats converted directly in SQL: (regular expression, to_date format)
+SQL_FORMATS = [
+    (r'^\d{4}-\d{2}-\d{2}$', 'YYYY-MM-DD'),
+    (r'^\d{4}$', 'YYYY'),
+]
+
+# Formats tried in Python for the remaining rows, in order of preference.
+# The SQL formats come first: a single out of range value makes SQL leave
+# its whole id range, valid rows included, to this pass.
+PYTHON_FORMATS = [
+    '%Y-%m-%d', '%Y',
+    '%d/%m/%Y', '%m/%d/%Y', '%d.%m.%Y', '%d-%m-%Y',
+    '%Y/%m/%d', '%Y%m%d', '%d %B %Y', '%B %d, %Y', '%b %Y',
+]
+
+
+def _id_range(cr):
+    cr.execute('SELECT min(id), max(id) FROM library_book')
+    return cr.fetchone()
+
+
+def _log_progress(step, done, start):
+    elapsed = time.time() - start
+    _logger.info(
+        'library_book date migration (%s): %d rows in %.1fs (%.0f rows/s)',
+        step, done, elapsed, done / elapsed if elapsed else 0)
+
+
+def _convert_in_sql(cr):
+    """Convert the well-formed values in place, one id range at a time."""
+    min_id, max_id = _id_range(cr)
+    if min_id is None:
+        return
+    for regexp, date_format in SQL_FORMATS:
+        start, done = time.time(), 0
+        for low in range(min_id, max_id + 1, CHUNK_SIZE):
+            query = """
+                UPDATE library_book
+                SET date_release = to_date(date_release_char, %s)
+                WHERE id >= %s AND id < %s
+                AND date_release IS NULL
+                AND date_release_char ~ %s"""
+            params = (date_format, low, low + CHUNK_SIZE, regexp)
+            try:
+                with cr.savepoint():
+                    cr.execute(query, params)
+                done += cr.rowcount
+            except Exception:
+                # Out of range values (e.g. 2018-02-30): leave the chunk
+                # to the Python pass
+                _logger.warning(
+                    'Could not convert ids %d-%d as %s in SQL',
+                    low, low + CHUNK_SIZE - 1, date_format)
+        _log_progress(date_format, done, start)
+
+
+def _parse_date(value):
+    value = value.strip()
+    for date_format in PYTHON_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _convert_in_python(cr):
+    """Parse the leftovers in batches, walking ids instead of using an
+    OFFSET, and write each batch with a single UPDATE."""
+    start, done, failed, last_id = time.time(), 0, 0, 0
+    while True:
+        cr.execute("""
+            SELECT id, date_release_char FROM library_book
+            WHERE id > %s
+            AND date_release IS NULL
+            AND COALESCE(date_release_char, '') != ''
+            ORDER BY id
+            LIMIT %s""", (last_id, CHUNK_SIZE))
+        rows = cr.fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        ids, dates = [], []
+        for record_id, old_date in rows:
+            new_date = _parse_date(old_date)
+            if new_date:
+                ids.append(record_id)
+                dates.append(new_date)
+            else:
+                failed += 1
+                _logger.debug(
+                    'Unrecognised release date %r on book %d',
+                    old_date, record_id)
+        if ids:
+            cr.execute("""
+                UPDATE library_book AS book
+                SET date_release = new.date_release
+                FROM unnest(%s::int[], %s::date[])
+                    AS new (id, date_release)
+                WHERE book.id = new.id""", (ids, dates))
+        done += len(rows)
+        _log_progress('python', done, start)
+    if failed:
+        _logger.warning(
+            '%d books have an unrecognised release date, left empty',
+            failed)
+
+
+def migrate(cr, version):
+    _convert_in_sql(cr)
+    _convert_in_python(cr)
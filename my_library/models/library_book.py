@@ -1,9 +1,13 @@
-from odoo import models, fields, api, exceptions
+from odoo import models, fields, api, exceptions, tools
 from odoo.addons import decimal_precision as dp
 from odoo.exceptions import ValidationError
-from datetime import timedelta
+from datetime import date, timedelta
 from odoo.exceptions import UserError
 from odoo.tools.translate import _
+import logging
+import threading
+
+_logger = logging.getLogger(__name__)
 
 
 class BaseArchive(models.AbstractModel):
@@ -33,8 +37,12 @@ class LibraryBook(models.Model):
     cover = fields.Binary('Book Cover')
     out_of_print = fields.Boolean('Out of Print?') 
     name = fields.Char('Title', required=True)
-    date_release = fields.Date('Release Date')
+    date_release = fields.Date('Release Date', index=True)
     author_ids = fields.Many2many('res.partner', string='Authors')
+    author_names = fields.Char(
+        'Author Names',
+        compute='_compute_author_names',
+        store=True)
     date_updated = fields.Datetime('Last Updated')
     pages = fields.Integer('Number of Pages',
             groups='base.group_user',
@@ -75,7 +83,7 @@ class LibraryBook(models.Model):
                     selection='_referencable_models',
                     string='Reference Document')
     manager_remarks = fields.Text('Manager Remarks')
-    isbn = fields.Char('ISBN')
+    isbn = fields.Char('ISBN', index=True)
     old_edition = fields.Many2one('library.book', string='Old Edition')
 
     _sql_constraints = [
@@ -87,13 +95,21 @@ class LibraryBook(models.Model):
           'No of pages must be positive')
         ]
 
+    @api.depends('author_ids.name')
+    def _compute_author_names(self):
+        # Read the authors of all books, then their names, in two queries
+        self.mapped('author_ids.name')
+        for book in self:
+            book.author_names = ', '.join(book.author_ids.mapped('name'))
+
     def name_get(self):
+        # author_names is stored and kept up to date by the ORM, so display
+        # names only need the book rows, read for all books at once
         result = []
         for book in self:
-            authors = book.author_ids.mapped('name')
-            name = '%s (%s)' % (book.name, ', '.join(authors))
+            name = '%s (%s)' % (book.name, book.author_names or '')
             result.append((book.id, name))
-            return result
+        return result
 
     @api.constrains('date_release')
     def _check_release_date(self):
@@ -105,10 +121,12 @@ class LibraryBook(models.Model):
 
     @api.depends('date_release')
     def _compute_age(self):
+        # Plain date arithmetic on the prefetched release dates: no query
+        # per book, and every record gets a value
         today = fields.Date.today()
-        for book in self.filtered('date_release'):
-            delta = today - book.date_release
-            book.age_days = delta.days
+        for book in self:
+            book.age_days = book.date_release and \
+                (today - book.date_release).days
 
     def _inverse_age(self):
         today = fields.Date.today()
@@ -117,6 +135,8 @@ class LibraryBook(models.Model):
             book.date_release = d
 
     def _search_age(self, operator, value):
+        if value is False:
+            return [('date_release', operator, False)]
         today = fields.Date.today()
         value_days = timedelta(days=value)
         value_date = today - value_days
@@ -129,11 +149,120 @@ class LibraryBook(models.Model):
         new_op = operator_map.get(operator, operator)
         return [('date_release', new_op, value_date)]
 
+    # age_days is not stored: sorting and grouping on it are done in SQL
+    # on date_release, since the age only depends on the release date
+
+    @api.model
+    def _age_order_direction(self, direction, reverse_direction=False):
+        """SQL direction of date_release to order on age_days `direction`.
+
+        Older books have an earlier release date. Books without one have
+        no age and sort last, in both directions, whereas PostgreSQL puts
+        NULLs first in descending order.
+        """
+        ascending = direction.strip().lower() != 'desc'
+        if reverse_direction:
+            ascending = not ascending
+        return '%s NULLS LAST' % ('DESC' if ascending else 'ASC')
+
+    @api.model
+    def _generate_order_by_inner(self, alias, order_spec, query,
+                                 reverse_direction=False, seen=None):
+        if not order_spec or 'age_days' not in order_spec:
+            return super(LibraryBook, self)._generate_order_by_inner(
+                alias, order_spec, query,
+                reverse_direction=reverse_direction, seen=seen)
+        order_by_elements = []
+        for order_part in order_spec.split(','):
+            field, __, direction = order_part.strip().partition(' ')
+            if field == 'age_days':
+                order_by_elements.append('"%s"."date_release" %s' % (
+                    alias, self._age_order_direction(
+                        direction, reverse_direction)))
+            else:
+                order_by_elements += super(
+                    LibraryBook, self)._generate_order_by_inner(
+                        alias, order_part, query,
+                        reverse_direction=reverse_direction, seen=seen)
+        return order_by_elements
+
+    @api.model
+    def _read_group_prepare(self, orderby, aggregated_fields,
+                            annotated_groupbys, query):
+        if not orderby or 'age_days' not in orderby:
+            return super(LibraryBook, self)._read_group_prepare(
+                orderby, aggregated_fields, annotated_groupbys, query)
+        groupby_terms, orderby_terms = super(
+            LibraryBook, self)._read_group_prepare(
+                False, aggregated_fields, annotated_groupbys, query)
+        grouped = [gb['groupby'] for gb in annotated_groupbys]
+        for order_part in orderby.split(','):
+            field, __, direction = order_part.strip().partition(' ')
+            if field == 'age_days':
+                # Only possible when grouped by age, see read_group
+                if 'date_release:day' in grouped:
+                    orderby_terms.append('"date_release:day" %s' % (
+                        self._age_order_direction(direction)))
+                continue
+            more_groupby_terms, more_orderby_terms = super(
+                LibraryBook, self)._read_group_prepare(
+                    order_part, aggregated_fields, annotated_groupbys, query)
+            groupby_terms += [term for term in more_groupby_terms
+                              if term not in groupby_terms]
+            orderby_terms += more_orderby_terms
+        return groupby_terms, orderby_terms
+
+    @api.model
+    def fields_get(self, allfields=None, attributes=None):
+        res = super(LibraryBook, self).fields_get(
+            allfields=allfields, attributes=attributes)
+        if 'age_days' in res and (
+                not attributes or 'sortable' in attributes):
+            res['age_days']['sortable'] = True
+        return res
+
+    @api.model
+    def read_group(self, domain, fields, groupby, offset=0, limit=None,
+                   orderby=False, lazy=True):
+        groupby = [groupby] if isinstance(groupby, str) else list(groupby)
+        if 'age_days' not in groupby:
+            return super(LibraryBook, self).read_group(
+                domain, fields, groupby, offset=offset, limit=limit,
+                orderby=orderby, lazy=lazy)
+        # Books released on the same day have the same age
+        groupby = ['date_release:day' if g == 'age_days' else g
+                   for g in groupby]
+        fields = [f for f in fields if f.split(':')[0] != 'age_days']
+        # age_days in orderby is mapped by _read_group_prepare
+        result = super(LibraryBook, self).read_group(
+            domain, fields, groupby, offset=offset, limit=limit,
+            orderby=orderby, lazy=lazy)
+        today = date.today()
+        for group in result:
+            group.pop('date_release:day', None)
+            release = next((
+                leaf[2] for leaf in group.get('__domain', [])
+                if isinstance(leaf, (list, tuple))
+                and tuple(leaf[:2]) == ('date_release', '>=')), False)
+            group['age_days'] = release and (
+                today - date(*map(int, release[:10].split('-')))).days
+            if lazy and groupby[0] == 'date_release:day' \
+                    and 'date_release_count' in group:
+                group['age_days_count'] = group.pop('date_release_count')
+        return result
+
     @api.model
     def _referencable_models(self):
-        models = self.env['ir.model'].search([
+        return list(self._get_referencable_models())
+
+    @api.model
+    @tools.ormcache('self.env.lang')
+    def _get_referencable_models(self):
+        # Only changes when modules are installed or upgraded, which
+        # reloads the registry and its caches
+        models = self.env['ir.model'].sudo().search([
             ('field_id.name', '=', 'message_ids')])
-        return [(x.model, x.name) for x in models]
+        return tuple((x.model, x.name) for x in models)
 
     @api.model
     def is_allowed_transition(self, old_state, new_state):
@@ -212,7 +341,11 @@ class LibraryBook(models.Model):
                     'You are not allowed to modify '
                     'manager_remarks'
                 )
-        return super(LibraryBook, self).create(values)
+        book = super(LibraryBook, self).create(values)
+        # Books without a category nor a cost are in no cached aggregate
+        if values.get('category_id') or 'cost_price' in values:
+            self._invalidate_category_caches()
+        return book
 
     @api.multi
     def write(self, values):
@@ -222,12 +355,58 @@ class LibraryBook(models.Model):
                     'You are not allowed to modify '
                     'manager_remarks'
                 )
-        return super(LibraryBook, self).write(values)
+        result = super(LibraryBook, self).write(values)
+        if self._category_cache_fields & set(values):
+            self._invalidate_category_caches()
+        return result
+
+    @api.multi
+    def unlink(self):
+        result = super(LibraryBook, self).unlink()
+        self._invalidate_category_caches()
+        return result
     
+    def init(self):
+        # Trigram indexes for name_search; pg_trgm needs a superuser to be
+        # installed, so fall back to plain ilike searches without it
+        try:
+            with self.env.cr.savepoint():
+                self.env.cr.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        except Exception:
+            _logger.warning(
+                'pg_trgm is not available: book name search will not '
+                'use trigram indexes.')
+            return
+        for table, column in [('library_book2', 'name'),
+                              ('library_book2', 'isbn'),
+                              ('res_partner', 'name')]:
+            self.env.cr.execute("""
+                CREATE INDEX IF NOT EXISTS %s_%s_trgm_idx
+                ON %s USING gin (%s gin_trgm_ops)""" % (
+                    table, column, table, column))
+
+    @api.model
+    @tools.ormcache()
+    def _has_trigram_search(self):
+        self.env.cr.execute(
+            "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return bool(self.env.cr.fetchone())
+
     @api.model
     def _name_search(self, name='', args=None, operator='ilike',
                      limit=100, name_get_uid=None):
         args = [] if args is None else args.copy()
+        if name and operator == 'ilike':
+            # An exact ISBN match is the only result worth showing
+            books = self.browse(self._search(
+                args + [('isbn', '=', name)], limit=limit,
+                access_rights_uid=name_get_uid))
+            if not books and self._has_trigram_search():
+                books = self.browse(self._search_ranked(
+                    name, args, limit, access_rights_uid=name_get_uid))
+            if books or self._has_trigram_search():
+                return models.lazy_name_get(
+                    books.sudo(name_get_uid or self.env.uid))
         if not(name == '' and operator == 'ilike'):
             args += ['|', '|',
                 ('name', operator, name),
@@ -237,27 +416,166 @@ class LibraryBook(models.Model):
         return super(LibraryBook, self)._name_search(
             name=name, args=args, operator=operator,
             limit=limit, name_get_uid=name_get_uid)
-    
+
+    @api.model
+    def _search_ranked(self, name, args, limit, access_rights_uid=None):
+        """Ids of the books matching `name` on title, ISBN or author,
+        best trigram similarity first. The ilike conditions are served by
+        the trigram GIN indexes."""
+        model = self.sudo(access_rights_uid) if access_rights_uid else self
+        model.check_access_rights('read')
+        query = model._where_calc(args)
+        model._apply_ir_rules(query, 'read')
+        from_clause, where_clause, where_params = query.get_sql()
+        authors = self._fields['author_ids']
+        pattern = '%%%s%%' % name
+        self.env.cr.execute("""
+            SELECT library_book2.id
+            FROM %s
+            WHERE %s AND (
+                library_book2.name ILIKE %%s
+                OR library_book2.isbn ILIKE %%s
+                OR library_book2.id IN (
+                    SELECT rel.%s FROM %s rel
+                    JOIN res_partner author ON author.id = rel.%s
+                    WHERE author.name ILIKE %%s))
+            ORDER BY GREATEST(
+                similarity(library_book2.name, %%s),
+                similarity(COALESCE(library_book2.isbn, ''), %%s)) DESC,
+                library_book2.id
+            %s""" % (
+                from_clause, where_clause or 'TRUE',
+                authors.column1, authors.relation, authors.column2,
+                'LIMIT %d' % limit if limit else ''),
+            where_params + [pattern, pattern, pattern, name, name])
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    # Books updated per UPDATE by the price update job
+    _price_update_chunk = 10000
+
+    # Fields the cached per-category aggregates depend on
+    _category_cache_fields = {'cost_price', 'category_id', 'active', 'state'}
+    # Hit/miss counters of the average cost cache, per database
+    _average_cost_stats = {}
+
+    @api.model
+    def _lookup_average_cost(self, lookup, *args):
+        "Call the cached `lookup`, counting whether it hit the cache"
+        stats = self._average_cost_stats.setdefault(
+            self.env.cr.dbname, {'hit': 0, 'miss': 0})
+        misses = stats['miss']
+        result = lookup(*args)
+        if stats['miss'] == misses:
+            stats['hit'] += 1
+        return result
+
+    @api.model
+    def _count_average_cost_miss(self):
+        self._average_cost_stats.setdefault(
+            self.env.cr.dbname, {'hit': 0, 'miss': 0})['miss'] += 1
+
     @api.model
     def _get_average_cost(self):
-        grouped_result = self.read_group(
+        grouped_result = self._lookup_average_cost(
+            self._get_average_cost_data)
+        return [dict(group) for group in grouped_result]
+
+    @api.model
+    @tools.ormcache()
+    def _get_average_cost_data(self):
+        self._count_average_cost_miss()
+        grouped_result = self.sudo().read_group(
             [('cost_price', "!=", False)],  # Domain
             ['category_id', 'cost_price:avg'],  # Fields to access
             ['category_id']  # group_by
         )
-        return grouped_result
-    
+        return tuple(grouped_result)
+
     @api.model
-    def _update_book_price(self):
-        all_books = self.search([])
-        for book in all_books:
-            book.cost_price += 10
+    def get_category_average_cost(self, category_id):
+        return self._lookup_average_cost(
+            self._get_category_average_cost, category_id or False)
+
+    @api.model
+    @tools.ormcache('category_id')
+    def _get_category_average_cost(self, category_id):
+        self._count_average_cost_miss()
+        groups = self.sudo().read_group(
+            [('cost_price', '!=', False),
+             ('category_id', '=', category_id)],  # Domain
+            ['cost_price:avg'],  # Fields to access
+            []  # group_by
+        )
+        return groups and groups[0]['cost_price'] or 0.0
+
+    @api.model
+    def get_average_cost_cache_stats(self):
+        return dict(self._average_cost_stats.get(
+            self.env.cr.dbname, {'hit': 0, 'miss': 0}))
+
+    @api.model
+    def _invalidate_category_caches(self):
+        # ormcache entries are cleared in every worker, not only this one,
+        # once the transaction is committed
+        self.clear_caches()
+
+    @api.model
+    def _update_book_price(self, chunk_size=None):
+        # Bounded chunks, each committed to release its row locks, unless
+        # run while loading modules or in tests
+        commit = not self.pool._init and not getattr(
+            threading.currentThread(), 'testing', False)
+        self._bulk_increase_cost_price(
+            [], 10, chunk_size=chunk_size or self._price_update_chunk,
+            commit=commit)
     
     @api.model
-    def update_book_price(self, category, amount_to_increase):
-        category_books = self.search([('category_id', '=', category.id)])
-        for book in category_books:
-            book.cost_price += amount_to_increase
+    def update_book_price(self, category, amount_to_increase,
+                          chunk_size=None):
+        self.bulk_increase_cost_price(
+            [('category_id', '=', category.id)], amount_to_increase,
+            chunk_size=chunk_size)
+
+    @api.model
+    def bulk_increase_cost_price(self, domain, amount, chunk_size=None):
+        """Add `amount` to the cost price of the books matching `domain`.
+
+        Prices are changed with one UPDATE per chunk of `chunk_size` books
+        (a single UPDATE when no chunk size is given) instead of a write
+        per book.
+        """
+        return self._bulk_increase_cost_price(
+            domain, amount, chunk_size=chunk_size)
+
+    @api.model
+    def _bulk_increase_cost_price(self, domain, amount, chunk_size=None,
+                                  commit=False):
+        """Same as `bulk_increase_cost_price`. With `commit`, each chunk is
+        committed to release its row locks; only use it from crons or
+        scripts."""
+        self.check_access_rights('write')
+        books = self.search(domain)
+        books.check_access_rule('write')
+        if not books:
+            return 0
+        chunk_size = chunk_size or len(books)
+        for index in range(0, len(books), chunk_size):
+            chunk = books[index:index + chunk_size]
+            self.env.cr.execute("""
+                UPDATE library_book2
+                SET cost_price = COALESCE(cost_price, 0) + %s,
+                    write_uid = %s,
+                    write_date = (now() at time zone 'UTC')
+                WHERE id IN %s""",
+                (amount, self.env.uid, tuple(chunk.ids)))
+            chunk.invalidate_cache(
+                ['cost_price', 'write_uid', 'write_date'], chunk.ids)
+            chunk.modified(['cost_price'])
+            self.recompute()
+            if commit:
+                self.env.cr.commit()
+        self._invalidate_category_caches()
+        return len(books)
     
     def book_rent(self):
         self.ensure_one()
@@ -266,20 +584,12 @@ class LibraryBook(models.Model):
                 renting'))
     
     def average_book_occupation(self):
-        sql_query = """
-                    SELECT
-                    lb.name,
-                    avg((EXTRACT(epoch from age(return_date, rent_date)) /
-                    86400))::int
-                    FROM
-                    library_book_rent AS lbr
-                    JOIN
-                    library_book as lb ON lb.id = lbr.book_id
-                    WHERE lbr.state = 'returned'
-                    GROUP BY lb.name;"""
-        self.env.cr.execute(sql_query)
-        result = self.env.cr.fetchall()
-        # logger.info("Average book occupation: %s", result)
+        # Read the incrementally maintained statistics instead of
+        # aggregating the whole rent history
+        stats = self.env['library.book.rent.stat'].search([])
+        result = [(stat.book_id.name, stat.average_days) for stat in stats]
+        _logger.info("Average book occupation: %s", result)
+        return result
 
 
 class ResPartner(models.Model):
@@ -292,12 +602,33 @@ class ResPartner(models.Model):
         string='Authored Books',  # relation='library_book_res_partner_rel'
     )
     count_books = fields.Integer('Number of Authored Books',
-                                 compute='_compute_count_books')
+                                 compute='_compute_count_books',
+                                 store=True)
 
-    @api.depends('authored_book_ids')
+    @api.depends('authored_book_ids', 'authored_book_ids.active')
     def _compute_count_books(self):
+        # Count on the relation table for all partners at once, instead
+        # of loading every authored book id. Archived books are left out,
+        # as they are from authored_book_ids.
+        field = self._fields['authored_book_ids']
+        counts = {}
+        partner_ids = [pid for pid in self.ids if isinstance(pid, int)]
+        if partner_ids:
+            self.env.cr.execute("""
+                SELECT rel.%s, count(*) FROM %s rel
+                JOIN %s book ON book.id = rel.%s
+                WHERE rel.%s IN %%s AND book.active
+                GROUP BY rel.%s""" % (
+                    field.column1, field.relation,
+                    self.env[field.comodel_name]._table, field.column2,
+                    field.column1, field.column1),
+                (tuple(partner_ids),))
+            counts = dict(self.env.cr.fetchall())
         for r in self:
-            r.count_books = len(r.authored_book_ids)
+            if isinstance(r.id, int):
+                r.count_books = counts.get(r.id, 0)
+            else:
+                r.count_books = len(r.authored_book_ids)
 
 
 class LibraryMember(models.Model):
@@ -312,7 +643,7 @@ class LibraryMember(models.Model):
     date_of_birth = fields.Date('Date of birth')
 
 
-class LibraryBook(models.Model):
+class Book(models.Model):
     _inherit = 'library.book'
     date_return = fields.Date('Date to return')
     
@@ -322,16 +653,128 @@ class LibraryBookRent(models.Model):
     book_id = fields.Many2one('library.book', 'Book', required=True)
     borrower_id = fields.Many2one('res.partner', 'Borrower',
     required=True)
-    state = fields.Selection([('ongoing', 'Ongoing'), ('returned',
-                             'Returned')],
-                             'State', default='ongoing',
-                             required=True)
-    book_id = fields.Many2one('library.book', 'Book', required=True)
     rent_date = fields.Date(default=fields.Date.today)
     return_date = fields.Date()
-    rent_as_superuser = self.env['library.book.rent'].sudo()
     state = fields.Selection([('ongoing', 'Ongoing'),
                               ('returned', 'Returned'), ('lost',
                               'Lost')],
                              'State', default='ongoing',
                              required=True)
+
+    def book_return(self):
+        self.write({
+            'state': 'returned',
+            'return_date': fields.Date.today(),
+        })
+
+    # Fields the occupation statistics of a rent depend on
+    _rent_stat_fields = {'book_id', 'state', 'rent_date', 'return_date'}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        rents = super(LibraryBookRent, self).create(vals_list)
+        self.env['library.book.rent.stat']._apply_rent_changes(added=rents)
+        return rents
+
+    @api.multi
+    def write(self, values):
+        if not self._rent_stat_fields & set(values):
+            return super(LibraryBookRent, self).write(values)
+        # Take the rents out of the statistics as they were, and add them
+        # back as they are now
+        Stat = self.env['library.book.rent.stat']
+        removed = Stat._get_rent_days(self)
+        result = super(LibraryBookRent, self).write(values)
+        Stat._apply_rent_changes(removed=removed, added=self)
+        return result
+
+    @api.multi
+    def unlink(self):
+        Stat = self.env['library.book.rent.stat']
+        removed = Stat._get_rent_days(self)
+        result = super(LibraryBookRent, self).unlink()
+        Stat._apply_rent_changes(removed=removed)
+        return result
+
+
+class LibraryBookRentStat(models.Model):
+    _name = 'library.book.rent.stat'
+    _description = 'Book Occupation Statistics'
+    _rec_name = 'book_id'
+    book_id = fields.Many2one('library.book', 'Book', required=True,
+                              ondelete='cascade', readonly=True)
+    rent_count = fields.Integer('Returned Rents', readonly=True)
+    total_days = fields.Integer('Total Days Rented', readonly=True)
+    average_days = fields.Float('Average Days Rented', readonly=True)
+
+    _sql_constraints = [
+        ('book_uniq',
+         'UNIQUE (book_id)',
+         'There is only one statistics line per book.'),
+        ]
+
+    def init(self):
+        # Seed the statistics from the existing rent history, once
+        self.env.cr.execute("""
+            INSERT INTO library_book_rent_stat
+                (book_id, rent_count, total_days, average_days)
+            SELECT book_id, count(*), sum(return_date - rent_date),
+                   avg(return_date - rent_date)
+            FROM library_book_rent
+            WHERE state = 'returned'
+            AND return_date IS NOT NULL AND rent_date IS NOT NULL
+            GROUP BY book_id
+            ON CONFLICT (book_id) DO NOTHING""")
+
+    @api.model
+    def _get_rent_days(self, rents):
+        """Return {book_id: (rent count, days rented)} of the returned
+        `rents`, the ones counted in the statistics."""
+        days_by_book = {}
+        for rent in rents.filtered(lambda r: r.state == 'returned'
+                                   and r.rent_date and r.return_date):
+            count, days = days_by_book.get(rent.book_id.id, (0, 0))
+            days_by_book[rent.book_id.id] = (
+                count + 1, days + (rent.return_date - rent.rent_date).days)
+        return days_by_book
+
+    @api.model
+    def _apply_rent_changes(self, removed=None, added=None):
+        """Update the statistics for rents leaving them (`removed`, as
+        returned by `_get_rent_days`) and rents entering them (`added`)."""
+        changes = dict(removed or {})
+        for book_id, (count, days) in changes.items():
+            changes[book_id] = (-count, -days)
+        for book_id, (count, days) in self._get_rent_days(
+                added or self.env['library.book.rent']).items():
+            old_count, old_days = changes.get(book_id, (0, 0))
+            changes[book_id] = (old_count + count, old_days + days)
+        changes = {book_id: change for book_id, change in changes.items()
+                   if change != (0, 0)}
+        if not changes:
+            return
+        book_ids = list(changes)
+        self.env.cr.execute("""
+            INSERT INTO library_book_rent_stat AS stat
+                (book_id, rent_count, total_days, average_days)
+            SELECT book_id, rent_count, total_days,
+                   COALESCE(total_days::float / NULLIF(rent_count, 0), 0)
+            FROM unnest(%s::int[], %s::int[], %s::int[])
+                AS new (book_id, rent_count, total_days)
+            ON CONFLICT (book_id) DO UPDATE SET
+                rent_count = stat.rent_count + EXCLUDED.rent_count,
+                total_days = stat.total_days + EXCLUDED.total_days,
+                average_days = COALESCE(
+                    (stat.total_days + EXCLUDED.total_days)::float
+                    / NULLIF(stat.rent_count + EXCLUDED.rent_count, 0), 0)
+            RETURNING stat.id""",
+            (book_ids,
+             [changes[b][0] for b in book_ids],
+             [changes[b][1] for b in book_ids]))
+        self.invalidate_cache(ids=[row[0] for row in self.env.cr.fetchall()])
+
+    @api.model
+    def get_book_occupation(self, book_ids):
+        """Return [(book_id, average days rented)] for the given books."""
+        stats = self.search([('book_id', 'in', book_ids)])
+        return [(stat.book_id.id, stat.average_days) for stat in stats]
@@ -1,4 +1,4 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
 from odoo.exceptions import ValidationError
 
 
@@ -21,6 +21,13 @@ class BookCategory(models.Model):
         string='Child Categories')
     description = fields.Text('Description')
 
+    def init(self):
+        # The default parent_path index cannot serve LIKE prefixes
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS
+            library_book_category2_parent_path_prefix_idx
+            ON library_book_category2 (parent_path text_pattern_ops)""")
+
     @api.constrains('parent_id')
     def _check_hierarchy(self):
         if not self._check_recursion():
@@ -53,3 +60,43 @@ class LibraryBookCategory(models.Model):
                 'Maximum borrow days',
                 help="For how many days book can be borrowed",
                 default=10)
+
+    @api.multi
+    def get_subtree_stats(self):
+        """Book statistics of each category, subcategories included.
+
+        Returns [(category_id, {'book_count', 'available_count',
+        'average_cost'})], cached per category until the hierarchy or the
+        books of a category change.
+        """
+        return [(categ.id, dict(categ._get_subtree_stats()))
+                for categ in self]
+
+    @tools.ormcache('self.id')
+    def _get_subtree_stats(self):
+        self.ensure_one()
+        # A single prefix query on parent_path covers the whole subtree
+        self.env.cr.execute("""
+            SELECT count(book.id),
+                   count(book.id) FILTER (WHERE book.state = 'available'),
+                   avg(book.cost_price)
+            FROM library_book2 book
+            JOIN library_book_category categ
+                ON categ.id = book.category_id
+            WHERE book.active AND categ.parent_path LIKE %s""",
+            (self.parent_path + '%',))
+        book_count, available_count, average_cost = self.env.cr.fetchone()
+        return (('book_count', book_count),
+                ('available_count', available_count),
+                ('average_cost', average_cost or 0.0))
+
+    @api.multi
+    def write(self, vals):
+        if 'parent_id' in vals:
+            self.clear_caches()
+        return super(LibraryBookCategory, self).write(vals)
+
+    @api.multi
+    def unlink(self):
+        self.clear_caches()
+        return super(LibraryBookCategory, self).unlink()
@@ -0,0 +1,37 @@
+from odoo.tests.common import TransactionCase
+
+
+class TestBook(TransactionCase):
+
+    def setUp(self, *args, **kwargs):
+        result = super().setUp(*args, **kwargs)
+        self.Book = self.env['library.book2']
+        self.book_old = self.Book.create({
+            'name': 'Old Book', 'date_release': '2000-01-01'})
+        self.book_new = self.Book.create({
+            'name': 'New Book', 'date_release': '2018-01-01'})
+        self.book_undated = self.Book.create({'name': 'Undated Book'})
+        return result
+
+    def test_age_days_order(self):
+        "Books without a release date sort last by age, in both directions"
+        books = self.book_old | self.book_new | self.book_undated
+        domain = [('id', 'in', books.ids)]
+        self.assertEqual(
+            self.Book.search(domain, order='age_days asc').ids,
+            [self.book_new.id, self.book_old.id, self.book_undated.id])
+        self.assertEqual(
+            self.Book.search(domain, order='age_days desc').ids,
+            [self.book_old.id, self.book_new.id, self.book_undated.id])
+
+    def test_count_books_archived(self):
+        "Archived books are not counted in count_books"
+        Book = self.env['library.book']
+        book1 = Book.create({'name': 'Counted Book'})
+        book2 = Book.create({'name': 'Archived Book'})
+        author = self.env['res.partner'].create({
+            'name': 'Author',
+            'authored_book_ids': [(6, 0, [book1.id, book2.id])]})
+        self.assertEqual(author.count_books, 2)
+        book2.active = False
+        self.assertEqual(author.count_books, 1)
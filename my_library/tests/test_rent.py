@@ -0,0 +1,55 @@
+from odoo.tests.common import TransactionCase
+from odoo import exceptions
+
+
+class TestRent(TransactionCase):
+
+    def setUp(self, *args, **kwargs):
+        result = super().setUp(*args, **kwargs)
+        self.Rent = self.env['library.book.rent']
+        self.Stat = self.env['library.book.rent.stat']
+        self.book = self.env['library.book'].create({
+            'name': 'Rented Book', 'copies': 2})
+        self.borrower = self.env['res.partner'].create({'name': 'Borrower'})
+        return result
+
+    def assertStat(self, rent_count, total_days):
+        stat = self.Stat.search([('book_id', '=', self.book.id)])
+        self.assertEqual(
+            (stat.rent_count, stat.total_days), (rent_count, total_days))
+
+    def test_rent_stats(self):
+        "Occupation statistics follow every change of the rents"
+        rent = self.Rent.create({
+            'book_id': self.book.id,
+            'borrower_id': self.borrower.id,
+            'rent_date': '2018-01-01',
+            'return_date': '2018-01-11',
+            'state': 'returned'})
+        self.assertStat(1, 10)
+        rent.return_date = '2018-01-21'
+        self.assertStat(1, 20)
+        rent.state = 'ongoing'
+        self.assertStat(0, 0)
+        rent.state = 'returned'
+        self.assertStat(1, 20)
+        rent.unlink()
+        self.assertStat(0, 0)
+
+    def test_rent_wizard_copies(self):
+        "Books can be rented as long as copies are left"
+        self.Rent.create({
+            'book_id': self.book.id, 'borrower_id': self.borrower.id})
+        Wizard = self.env['library.rent.wizard']
+        wizard = Wizard.create({
+            'borrower_id': self.borrower.id,
+            'book_ids': [(6, 0, self.book.ids)]})
+        wizard.add_book_rents()
+        self.assertEqual(
+            self.Rent.search_count([('book_id', '=', self.book.id),
+                                    ('state', '=', 'ongoing')]), 2)
+        wizard = Wizard.create({
+            'borrower_id': self.borrower.id,
+            'book_ids': [(6, 0, self.book.ids)]})
+        with self.assertRaises(exceptions.UserError):
+            wizard.add_book_rents()
@@ -1,23 +1,39 @@
-from odoo import models, fields
+from odoo import models, fields, exceptions
+from odoo.tools.translate import _
 
 class LibraryRentWizard(models.TransientModel):
     _name = 'library.rent.wizard'
     borrower_id = fields.Many2one('res.partner',
     string='Borrower')
     book_ids = fields.Many2many('library.book',
-    string='Books'
+    string='Books')
 
     def add_book_rents(self):
         rentModel = self.env['library.book.rent']
+        books = self.mapped('book_ids')
+        # Count the ongoing rents of every requested book with one query,
+        # and compare them, plus the rents requested here, to the copies
+        groups = rentModel.read_group(
+            [('state', '=', 'ongoing'), ('book_id', 'in', books.ids)],
+            ['book_id'], ['book_id'])
+        rented = {group['book_id'][0]: group['book_id_count']
+                  for group in groups}
         for wiz in self:
             for book in wiz.book_ids:
-                rentModel.create({
-                    'borrower_id': wiz.borrower_id.id,
-                    'book_id': book.id
-                })
+                rented[book.id] = rented.get(book.id, 0) + 1
+        unavailable = books.filtered(lambda b: rented[b.id] > b.copies)
+        if unavailable:
+            raise exceptions.UserError(
+                _('Not enough copies left to rent: %s') %
+                ', '.join(unavailable.mapped('name')))
+        # One create call for all the rents of the wizard
+        rentModel.create([{
+            'borrower_id': wiz.borrower_id.id,
+            'book_id': book.id
+        } for wiz in self for book in wiz.book_ids])
         members = self.mapped('borrower_id')
         action = members.get_formview_action()
-        if len(borrowers.ids) > 1:
+        if len(members.ids) > 1:
             action['domain'] = [('id', 'in', tuple(members.ids))]
             action['view_mode'] = 'tree,form'
         return action